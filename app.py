@@ -1,16 +1,70 @@
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
+import copy
 import json
-from country_manager import CountryDataManager, LegislativeCalculatorEnhanced
+from country_manager import LegislativeCalculatorEnhanced, get_calculator, load_manager
+
+_FACTOR_DEFAULTS = {
+    'governing_party_support': 0.8,
+    'opposition_support': 0.3,
+    'public_opinion': 0.7,
+    'committee_approval': 0.9,
+    'upper_house_support': 0.8,
+    'lower_house_support': 0.8,
+    'fiscal_impact': 0.6,
+    'urgency_factor': 0.8,
+    'previous_similar_bills': 0.7,
+    'media_coverage': 0.6
+}
+
+_DISPLAY_NAMES = {factor: factor.replace('_', ' ').title() for factor in _FACTOR_DEFAULTS}
+
+# Static gauge spec as a plain dict; st.plotly_chart validates it once, so copying a
+# go.Figure template would only add a second validation pass
+_GAUGE_SPEC = {
+    'data': [{
+        'type': 'indicator',
+        'mode': "gauge+number",
+        'title': {'text': "Passage Probability"},
+        'domain': {'x': [0, 1], 'y': [0, 1]},
+        'gauge': {
+            'axis': {'range': [0, 100]},
+            'bar': {'color': "darkblue"},
+            'steps': [
+                {'range': [0, 20], 'color': "red"},
+                {'range': [20, 40], 'color': "orange"},
+                {'range': [40, 60], 'color': "yellow"},
+                {'range': [60, 80], 'color': "lightgreen"},
+                {'range': [80, 100], 'color': "green"}
+            ]
+        }
+    }]
+}
+
+@st.cache_data
+def interpret(probability):
+    """Cached interpretation text for a probability"""
+    return LegislativeCalculatorEnhanced.get_interpretation(probability)
+
+@st.cache_data
+def build_breakdown_rows(names, raw, weights, weighted):
+    """Build pre-formatted factor breakdown rows from the calculator's parallel arrays"""
+    return [
+        {
+            'Factor': _DISPLAY_NAMES[name],
+            'Score': f"{raw_score:.1%}",
+            'Weight': f"{weight:.1%}",
+            'Impact': f"{weighted_score:.1%}"
+        }
+        for name, raw_score, weight, weighted_score in zip(names, raw, weights, weighted)
+    ]
 
 def main():
     st.set_page_config(page_title="Legislative Success Calculator", layout="wide")
     
     # Initialize the data manager with the JSON file path
     try:
-        data_manager = CountryDataManager('data/factbook.json')
-        calculator = LegislativeCalculatorEnhanced(data_manager)
+        data_manager = load_manager('data/factbook.json')
+        calculator = get_calculator('data/factbook.json')
         
         st.title("Legislative Success Probability Calculator")
         st.markdown("""
@@ -42,81 +96,82 @@ def main():
             
             # Basic factors for all countries
             factors['governing_party_support'] = st.slider(
-                "Governing Party Support", 0.0, 1.0, 0.8,
+                "Governing Party Support", 0.0, 1.0, _FACTOR_DEFAULTS['governing_party_support'],
+                key='factor_governing_party_support',
                 help="Level of support from the governing party"
             )
             
             factors['opposition_support'] = st.slider(
-                "Opposition Support", 0.0, 1.0, 0.3,
+                "Opposition Support", 0.0, 1.0, _FACTOR_DEFAULTS['opposition_support'],
+                key='factor_opposition_support',
                 help="Level of support from opposition parties"
             )
             
             factors['public_opinion'] = st.slider(
-                "Public Opinion", 0.0, 1.0, 0.7,
+                "Public Opinion", 0.0, 1.0, _FACTOR_DEFAULTS['public_opinion'],
+                key='factor_public_opinion',
                 help="Level of public support"
             )
             
             factors['committee_approval'] = st.slider(
-                "Committee Approval", 0.0, 1.0, 0.9,
+                "Committee Approval", 0.0, 1.0, _FACTOR_DEFAULTS['committee_approval'],
+                key='factor_committee_approval',
                 help="Level of support from relevant committees"
             )
             
             # Add bicameral-specific factors if applicable
             if country_system and country_system['legislature_type'] == 'bicameral':
                 factors['upper_house_support'] = st.slider(
-                    "Upper House Support", 0.0, 1.0, 0.8,
+                    "Upper House Support", 0.0, 1.0, _FACTOR_DEFAULTS['upper_house_support'],
+                    key='factor_upper_house_support',
                     help="Level of support in upper house"
                 )
                 factors['lower_house_support'] = st.slider(
-                    "Lower House Support", 0.0, 1.0, 0.8,
+                    "Lower House Support", 0.0, 1.0, _FACTOR_DEFAULTS['lower_house_support'],
+                    key='factor_lower_house_support',
                     help="Level of support in lower house"
                 )
             
             # Common factors continued
             factors['fiscal_impact'] = st.slider(
-                "Fiscal Impact", 0.0, 1.0, 0.6,
+                "Fiscal Impact", 0.0, 1.0, _FACTOR_DEFAULTS['fiscal_impact'],
+                key='factor_fiscal_impact',
                 help="Positive fiscal impact"
             )
             
             factors['urgency_factor'] = st.slider(
-                "Urgency Factor", 0.0, 1.0, 0.8,
+                "Urgency Factor", 0.0, 1.0, _FACTOR_DEFAULTS['urgency_factor'],
+                key='factor_urgency_factor',
                 help="How urgent is the bill"
             )
             
             factors['previous_similar_bills'] = st.slider(
-                "Previous Similar Bills Success", 0.0, 1.0, 0.7,
+                "Previous Similar Bills Success", 0.0, 1.0, _FACTOR_DEFAULTS['previous_similar_bills'],
+                key='factor_previous_similar_bills',
                 help="Success rate of similar bills"
             )
             
             factors['media_coverage'] = st.slider(
-                "Media Coverage", 0.0, 1.0, 0.6,
+                "Media Coverage", 0.0, 1.0, _FACTOR_DEFAULTS['media_coverage'],
+                key='factor_media_coverage',
                 help="Favorability of media coverage"
             )
         
-        # Calculate probability using the enhanced calculator
-        probability, breakdown = calculator.calculate_probability(country, factors)
-        interpretation = calculator.get_interpretation(probability)
+        # Calculate probability using the enhanced calculator, only when the country or a factor changed
+        factors_key = (country, tuple(sorted(factors.items())))
+        if st.session_state.get('_bd_key') != factors_key:
+            st.session_state._bd_result = calculator.calculate_probability(country, factors)
+            st.session_state._bd_rows = None
+            # Set the key last so a failed calculation is retried on the next rerun
+            st.session_state._bd_key = factors_key
+        probability, breakdown = st.session_state._bd_result
+        interpretation = interpret(probability)
         
         with col2:
             st.subheader("Analysis Results")
             
-            fig = go.Figure(go.Indicator(
-                mode="gauge+number",
-                value=probability * 100,
-                title={'text': "Passage Probability"},
-                domain={'x': [0, 1], 'y': [0, 1]},
-                gauge={
-                    'axis': {'range': [0, 100]},
-                    'bar': {'color': "darkblue"},
-                    'steps': [
-                        {'range': [0, 20], 'color': "red"},
-                        {'range': [20, 40], 'color': "orange"},
-                        {'range': [40, 60], 'color': "yellow"},
-                        {'range': [60, 80], 'color': "lightgreen"},
-                        {'range': [80, 100], 'color': "green"}
-                    ]
-                }
-            ))
+            fig = copy.deepcopy(_GAUGE_SPEC)
+            fig['data'][0]['value'] = probability * 100
             
             st.plotly_chart(fig)
             
@@ -128,16 +183,11 @@ def main():
                 st.json(country_system)
             
             st.markdown("### Factor Breakdown")
-            breakdown_df = pd.DataFrame([
-                {
-                    'Factor': k.replace('_', ' ').title(),
-                    'Score': f"{v['raw_score']:.1%}",
-                    'Weight': f"{v['weight']:.1%}",
-                    'Impact': f"{v['weighted_score']:.1%}"
-                }
-                for k, v in breakdown.items()
-            ])
-            st.dataframe(breakdown_df, hide_index=True)
+            if st.session_state._bd_rows is None:
+                st.session_state._bd_rows = build_breakdown_rows(
+                    breakdown['names'], breakdown['raw'], breakdown['weights'], breakdown['weighted']
+                )
+            st.dataframe(st.session_state._bd_rows, hide_index=True)
             
     except Exception as e:
         st.error(f"Error loading country data: {str(e)}")
@@ -1,119 +1,218 @@
-import json
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    try:
+        from ujson import loads as json_loads
+    except ImportError:
+        from json import loads as json_loads
+import os
+import pickle
+import re
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 import streamlit as st
 
+# Case-insensitive matchers so descriptions are never copied just to lowercase them
+_LEGISLATURE_PATTERNS = (
+    ('bicameral', re.compile('bicameral', re.IGNORECASE)),
+    ('unicameral', re.compile('unicameral', re.IGNORECASE))
+)
+_SYSTEM_PATTERNS = (
+    ('parliamentary', re.compile('parliamentary', re.IGNORECASE)),
+    ('presidential', re.compile('presidential', re.IGNORECASE)),
+    ('monarchy', re.compile('monarchy', re.IGNORECASE))
+)
+
+_SYSTEM_COLUMNS = (
+    'country_code', 'government_type', 'capital', 'executive_branch', 'legislative_branch',
+    'judicial_branch', 'political_parties', 'suffrage', 'election_results',
+    'legislature_type', 'system_type'
+)
+
+def _classify(description, patterns, default):
+    """Name of the first pattern found in description, checked in priority order"""
+    description = str(description)
+    for name, pattern in patterns:
+        if pattern.search(description):
+            return name
+    return default
+
+def dig(data, *keys, default=''):
+    """Walk nested dicts along keys, returning default when any step is missing"""
+    for key in keys:
+        if not isinstance(data, dict):
+            return default
+        data = data.get(key)
+        if data is None:
+            return default
+    return data
+
+def political_systems_path(factbook_json_path):
+    """Path of the pre-baked political_systems sidecar shipped next to the factbook"""
+    return os.path.join(os.path.dirname(factbook_json_path), 'political_systems.pkl')
+
+def save_political_systems(sidecar_path, political_systems_df):
+    """Write the political_systems sidecar read by CountryDataManager"""
+    with open(sidecar_path, 'wb') as file:
+        pickle.dump(political_systems_df, file, protocol=5)
+
+@lru_cache(maxsize=None)
+def _base_weights_for(system_type, legislature_type):
+    """Base weights for a political system, cached as a tuple of factor names and a read-only float64 array"""
+    weights = {
+        'governing_party_support': 0.30,
+        'opposition_support': 0.15,
+        'public_opinion': 0.10,
+        'committee_approval': 0.20,
+        'fiscal_impact': 0.10,
+        'urgency_factor': 0.05,
+        'previous_similar_bills': 0.05,
+        'media_coverage': 0.05
+    }
+    
+    # Adjust weights based on system type
+    if system_type == 'presidential':
+        weights['governing_party_support'] = 0.25
+        weights['opposition_support'] = 0.25
+    elif system_type == 'monarchy':
+        weights['governing_party_support'] = 0.25
+        weights['public_opinion'] = 0.15
+    
+    # Adjust for legislature type
+    if legislature_type == 'bicameral':
+        # Reduce all weights proportionally to make room for chamber-specific weights
+        for key in weights:
+            weights[key] *= 0.7
+        # Add chamber-specific weights
+        weights['upper_house_support'] = 0.15
+        weights['lower_house_support'] = 0.15
+    
+    weight_values = np.fromiter(weights.values(), dtype=np.float64, count=len(weights))
+    weight_values.flags.writeable = False
+    return tuple(weights), weight_values
+
 class CountryDataManager:
     def __init__(self, factbook_json_path):
         """Initialize with CIA World Factbook data"""
-        with open(factbook_json_path, 'r', encoding='utf-8') as file:
-            self.factbook_data = json.load(file)
+        self.factbook_data = None
+        self.political_systems_df = None
+        self._country_names = None
+        self._country_systems = {}
+        
+        # Use the baked sidecar (see scripts/bake_factbook.py) unless the factbook is newer;
+        # a sidecar deployed without the factbook is always used
+        sidecar_path = political_systems_path(factbook_json_path)
+        stale_sidecar = False
+        if os.path.exists(sidecar_path) and (
+                not os.path.exists(factbook_json_path) or
+                os.path.getmtime(sidecar_path) >= os.path.getmtime(factbook_json_path)):
+            with open(sidecar_path, 'rb') as file:
+                political_systems_df = pickle.load(file)
+            # Sidecars baked before the DataFrame format hold a dict and need re-baking
+            if isinstance(political_systems_df, pd.DataFrame):
+                self.political_systems_df = political_systems_df
+            else:
+                stale_sidecar = True
+        
+        if self.political_systems_df is None:
+            # Parse straight from bytes; every loader here handles UTF-8 input itself
+            with open(factbook_json_path, 'rb') as file:
+                self.factbook_data = json_loads(file.read())
+            
+            self.political_systems_df = self.extract_political_systems()
+            
+            if stale_sidecar:
+                try:
+                    save_political_systems(sidecar_path, self.political_systems_df)
+                except OSError as e:
+                    print(f"Could not re-bake {sidecar_path}: {str(e)}")
         
-        self.political_systems = self.extract_political_systems()
+        # (system_type, legislature_type) per country, so per-rerun lookups avoid DataFrame indexing
+        self._system_keys = dict(zip(
+            self.political_systems_df.index,
+            zip(self.political_systems_df['system_type'], self.political_systems_df['legislature_type'])
+        ))
     
     def extract_political_systems(self):
         """Extract relevant political system information from Factbook data"""
         political_systems = {}
         
+        # One walk per Government record; later entries win when several countries share a name
         for country_code, data in self.factbook_data.items():
-            try:
-                if 'Government' not in data:
-                    continue
-                    
-                gov_data = data['Government']
-                country_name = data.get('Government', {}).get('country_name', {}).get('conventional_long', '')
-                
-                political_systems[country_name] = {
-                    'country_code': country_code,
-                    'government_type': gov_data.get('government_type', ''),
-                    'capital': gov_data.get('capital', {}).get('name', ''),
-                    'executive_branch': {
-                        'chief_of_state': gov_data.get('executive_branch', {}).get('chief_of_state', ''),
-                        'head_of_government': gov_data.get('executive_branch', {}).get('head_of_government', ''),
-                        'election_process': gov_data.get('executive_branch', {}).get('election_process', '')
-                    },
-                    'legislative_branch': {
-                        'structure': gov_data.get('legislative_branch', {}).get('structure', ''),
-                        'description': gov_data.get('legislative_branch', {}).get('description', ''),
-                        'election_process': gov_data.get('legislative_branch', {}).get('election_process', '')
-                    },
-                    'judicial_branch': {
-                        'highest_courts': gov_data.get('judicial_branch', {}).get('highest_courts', ''),
-                        'selection_process': gov_data.get('judicial_branch', {}).get('selection_process', '')
-                    },
-                    'political_parties': gov_data.get('political_parties_and_leaders', {}),
-                    'suffrage': gov_data.get('suffrage', ''),
-                    'election_results': gov_data.get('election_results', {})
-                }
-                
-                # Determine legislature type
-                legislative_desc = str(gov_data.get('legislative_branch', {}).get('structure', '')).lower()
-                if 'bicameral' in legislative_desc:
-                    political_systems[country_name]['legislature_type'] = 'bicameral'
-                elif 'unicameral' in legislative_desc:
-                    political_systems[country_name]['legislature_type'] = 'unicameral'
-                else:
-                    political_systems[country_name]['legislature_type'] = 'unknown'
-                
-                # Determine system type
-                gov_type = str(gov_data.get('government_type', '')).lower()
-                if 'parliamentary' in gov_type:
-                    political_systems[country_name]['system_type'] = 'parliamentary'
-                elif 'presidential' in gov_type:
-                    political_systems[country_name]['system_type'] = 'presidential'
-                elif 'monarchy' in gov_type:
-                    political_systems[country_name]['system_type'] = 'monarchy'
-                else:
-                    political_systems[country_name]['system_type'] = 'other'
-                
-            except Exception as e:
-                print(f"Error processing {country_code}: {str(e)}")
+            gov_data = data.get('Government') if isinstance(data, dict) else None
+            if not isinstance(gov_data, dict):
                 continue
+            
+            government_type = dig(gov_data, 'government_type')
+            legislative_structure = dig(gov_data, 'legislative_branch', 'structure')
+            political_systems[dig(gov_data, 'country_name', 'conventional_long')] = {
+                'country_code': country_code,
+                'government_type': government_type,
+                'capital': dig(gov_data, 'capital', 'name'),
+                'executive_branch': {
+                    'chief_of_state': dig(gov_data, 'executive_branch', 'chief_of_state'),
+                    'head_of_government': dig(gov_data, 'executive_branch', 'head_of_government'),
+                    'election_process': dig(gov_data, 'executive_branch', 'election_process')
+                },
+                'legislative_branch': {
+                    'structure': legislative_structure,
+                    'description': dig(gov_data, 'legislative_branch', 'description'),
+                    'election_process': dig(gov_data, 'legislative_branch', 'election_process')
+                },
+                'judicial_branch': {
+                    'highest_courts': dig(gov_data, 'judicial_branch', 'highest_courts'),
+                    'selection_process': dig(gov_data, 'judicial_branch', 'selection_process')
+                },
+                'political_parties': gov_data.get('political_parties_and_leaders', {}),
+                'suffrage': dig(gov_data, 'suffrage'),
+                'election_results': gov_data.get('election_results', {}),
+                'legislature_type': _classify(legislative_structure, _LEGISLATURE_PATTERNS, 'unknown'),
+                'system_type': _classify(government_type, _SYSTEM_PATTERNS, 'other')
+            }
         
-        return political_systems
+        # Object columns skip string-dtype inference; the two classifications become categories
+        systems_df = pd.DataFrame.from_dict(political_systems, orient='index', columns=_SYSTEM_COLUMNS, dtype=object)
+        for column in ('legislature_type', 'system_type'):
+            systems_df[column] = pd.Categorical(systems_df[column])
+        return systems_df
     
     def get_country_system(self, country_name):
         """Get political system details for a specific country"""
-        return self.political_systems.get(country_name, None)
+        if country_name not in self._country_systems:
+            if country_name not in self._system_keys:
+                return None
+            self._country_systems[country_name] = self.political_systems_df.loc[country_name].to_dict()
+        return self._country_systems[country_name]
+    
+    def get_system_type(self, country_name):
+        """Get the system type for a specific country"""
+        system_keys = self._system_keys.get(country_name)
+        if system_keys is None:
+            return None
+        return system_keys[0]
     
     def calculate_base_weights(self, country_name):
         """Calculate base weights based on country's political system"""
-        country_data = self.get_country_system(country_name)
-        if not country_data:
+        system_keys = self._system_keys.get(country_name)
+        if system_keys is None:
             return None
-            
-        weights = {
-            'governing_party_support': 0.30,
-            'opposition_support': 0.15,
-            'public_opinion': 0.10,
-            'committee_approval': 0.20,
-            'fiscal_impact': 0.10,
-            'urgency_factor': 0.05,
-            'previous_similar_bills': 0.05,
-            'media_coverage': 0.05
-        }
-        
-        # Adjust weights based on system type
-        if country_data['system_type'] == 'presidential':
-            weights['governing_party_support'] = 0.25
-            weights['opposition_support'] = 0.25
-        elif country_data['system_type'] == 'monarchy':
-            weights['governing_party_support'] = 0.25
-            weights['public_opinion'] = 0.15
-        
-        # Adjust for legislature type
-        if country_data['legislature_type'] == 'bicameral':
-            # Reduce all weights proportionally to make room for chamber-specific weights
-            for key in weights:
-                weights[key] *= 0.7
-            # Add chamber-specific weights
-            weights['upper_house_support'] = 0.15
-            weights['lower_house_support'] = 0.15
         
-        return weights
+        factor_names, weights = _base_weights_for(*system_keys)
+        return dict(zip(factor_names, weights.tolist()))
+    
+    def get_weight_vector(self, country_name):
+        """Get (factor_names, weights) for a country, with weights as a shared read-only array"""
+        system_keys = self._system_keys.get(country_name)
+        if system_keys is None:
+            return None
+        return _base_weights_for(*system_keys)
     
     def get_all_country_names(self):
         """Get list of all countries in the database"""
-        return sorted(self.political_systems.keys())
+        if self._country_names is None:
+            self._country_names = self.political_systems_df.index.sort_values().tolist()
+        return self._country_names
 
 class LegislativeCalculatorEnhanced:
     def __init__(self, country_data_manager):
@@ -121,40 +220,68 @@ class LegislativeCalculatorEnhanced:
     
     def calculate_probability(self, country_name, factors):
         """Calculate passage probability with country-specific adjustments"""
-        base_weights = self.data_manager.calculate_base_weights(country_name)
-        if not base_weights:
+        weight_vector = self.data_manager.get_weight_vector(country_name)
+        if weight_vector is None:
             return None, None
             
-        country_system = self.data_manager.get_country_system(country_name)
+        system_type = self.data_manager.get_system_type(country_name)
         
-        # Calculate weighted score
-        total_score = 0
-        breakdown = {}
+        # Calculate weighted score over the precomputed weights, masking out factors not supplied
+        factor_names, weights = weight_vector
+        if not all(factor in factors for factor in factor_names):
+            supplied = np.fromiter((factor in factors for factor in factor_names), dtype=bool, count=len(factor_names))
+            factor_names = tuple(factor for factor in factor_names if factor in factors)
+            weights = weights[supplied]
+        raw_scores = np.fromiter((factors[f] for f in factor_names), dtype=np.float64, count=len(factor_names))
+        weighted_scores = raw_scores * weights
+        total_score = float(weighted_scores.sum())
         
-        for factor, weight in base_weights.items():
-            if factor in factors:
-                score = factors[factor] * weight
-                total_score += score
-                breakdown[factor] = {
-                    'raw_score': factors[factor],
-                    'weight': weight,
-                    'weighted_score': score
-                }
+        # Parallel arrays aligned to factor_names rather than a dict per factor
+        breakdown = {
+            'names': factor_names,
+            'raw': raw_scores,
+            'weights': weights,
+            'weighted': weighted_scores
+        }
         
         # Apply system-specific modifiers
-        if country_system['system_type'] == 'monarchy':
+        if system_type == 'monarchy':
             if factors.get('governing_party_support', 0) < 0.3:
                 total_score *= 0.5
         
         final_probability = max(0, min(1, total_score))
         return final_probability, breakdown
+    
+    @staticmethod
+    def get_interpretation(probability):
+        """Describe a passage probability using the same bands as the gauge chart"""
+        if probability >= 0.8:
+            return "Very likely to pass"
+        elif probability >= 0.6:
+            return "Likely to pass"
+        elif probability >= 0.4:
+            return "Uncertain outcome"
+        elif probability >= 0.2:
+            return "Unlikely to pass"
+        else:
+            return "Very unlikely to pass"
+
+@st.cache_resource
+def load_manager(path):
+    """Parse the factbook once per process instead of on every rerun"""
+    return CountryDataManager(path)
+
+@st.cache_resource
+def get_calculator(path):
+    """Build the calculator once per process for the given factbook"""
+    return LegislativeCalculatorEnhanced(load_manager(path))
 
 def main():
     st.set_page_config(page_title="Enhanced Legislative Calculator", layout="wide")
     
-    # Initialize data manager with CIA Factbook data
-    data_manager = CountryDataManager('path_to_your_factbook.json')
-    calculator = LegislativeCalculatorEnhanced(data_manager)
+    # Initialize data manager with CIA Factbook data (cached for the process lifetime)
+    data_manager = load_manager('path_to_your_factbook.json')
+    calculator = get_calculator('path_to_your_factbook.json')
     
     # Rest of your Streamlit UI code...
     # Now using the enhanced calculator with CIA Factbook data
\ No newline at end of file
@@ -0,0 +1,23 @@
+"""Pre-compute political_systems from the factbook so the app can skip parsing it at startup"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from country_manager import CountryDataManager, political_systems_path, save_political_systems
+
+def main():
+    factbook_json_path = sys.argv[1] if len(sys.argv) > 1 else 'data/factbook.json'
+    sidecar_path = political_systems_path(factbook_json_path)
+    
+    # Remove any existing sidecar so the manager re-extracts from the JSON
+    if os.path.exists(sidecar_path):
+        os.remove(sidecar_path)
+    
+    data_manager = CountryDataManager(factbook_json_path)
+    save_political_systems(sidecar_path, data_manager.political_systems_df)
+    
+    print(f"Wrote {len(data_manager.political_systems_df)} countries to {sidecar_path}")
+
+if __name__ == "__main__":
+    main()